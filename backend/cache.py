@@ -1,26 +1,87 @@
-"""Souborový JSON cache s TTL pro ukládání stažených dat."""
+"""
+Souborový cache s TTL pro ukládání stažených dat.
+
+Časové řady se ukládají jako Feather (pyarrow, komprese lz4), obecné payloady
+jako gzipovaný JSON. Bez pyarrow se i časové řady ukládají do gzipovaného JSON.
+"""
 from __future__ import annotations
 
+import gzip
 import json
 import time
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
+
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # orjson je volitelné zrychlení, stdlib json stačí
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # bez pyarrow se časové řady cachují jako JSON
+    pa = None
+    feather = None
 
 CACHE_DIR = Path(__file__).parent.parent / ".cache"
 TTL_SECONDS = 86400  # 24 hodin
 
+CACHE_DIR.mkdir(exist_ok=True)
+_PATHS: dict[str, Path] = {}
+
+
+def json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serializuje objekt do UTF-8 JSON (orjson, pokud je k dispozici)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_loads(data: bytes | str) -> Any:
+    """Deserializuje JSON (orjson, pokud je k dispozici)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _cache_path(key: str, suffix: str = ".json.gz") -> Path:
+    name = f"{key}{suffix}"
+    path = _PATHS.get(name)
+    if path is None:
+        path = _PATHS[name] = CACHE_DIR / name
+    return path
 
-def _cache_path(key: str) -> Path:
-    CACHE_DIR.mkdir(exist_ok=True)
-    return CACHE_DIR / f"{key}.json"
+
+def _feather_path(key: str) -> Path:
+    return _cache_path(key, ".feather")
+
+
+def _read_entry(path: Path) -> dict:
+    """Načte gzipovaný JSON záznam {"timestamp", "payload"}."""
+    return json_loads(gzip.decompress(path.read_bytes()))
+
+
+def _feather_metadata(path: Path) -> dict:
+    """Metadata schématu Feather souboru (bez čtení dat)."""
+    schema = pa.ipc.open_file(str(path)).schema
+    return {k.decode(): v.decode() for k, v in schema.metadata.items()}
+
+
+def _feather_timestamp(path: Path) -> float:
+    """Čas uložení z metadat schématu (bez čtení dat)."""
+    return float(_feather_metadata(path)["timestamp"])
 
 
 def get_cached(key: str) -> Optional[dict]:
     path = _cache_path(key)
     if not path.exists():
         return None
-    with open(path) as f:
-        data = json.load(f)
+    data = _read_entry(path)
     if time.time() - data["timestamp"] > TTL_SECONDS:
         return None
     return data["payload"]
@@ -28,15 +89,103 @@ def get_cached(key: str) -> Optional[dict]:
 
 def set_cached(key: str, payload: dict) -> None:
     path = _cache_path(key)
-    with open(path, "w") as f:
-        json.dump({"timestamp": time.time(), "payload": payload}, f)
+    entry = json_dumps({"timestamp": time.time(), "payload": payload})
+    path.write_bytes(gzip.compress(entry, compresslevel=3))  # nízká úroveň = levné CPU
 
 
-def get_cache_info(key: str) -> dict:
-    path = _cache_path(key)
+def _read_df(key: str) -> Optional[tuple[pd.Series, float, dict]]:
+    """Načte časovou řadu bez ohledu na TTL: (řada, timestamp, HTTP validátory)."""
+    if feather is None:
+        path = _cache_path(key)
+        if not path.exists():
+            return None
+        data = _read_entry(path)
+        payload = data["payload"]
+        series = pd.Series(payload["values"], index=pd.to_datetime(payload["dates"]), dtype=float)
+        return series, data["timestamp"], payload.get("validators", {})
+
+    path = _feather_path(key)
     if not path.exists():
-        return {"exists": False, "age_hours": None}
-    with open(path) as f:
-        data = json.load(f)
-    age_hours = (time.time() - data["timestamp"]) / 3600
-    return {"exists": True, "age_hours": round(age_hours, 1), "timestamp": data["timestamp"]}
+        return None
+    table = feather.read_table(str(path))
+    meta = {k.decode(): v.decode() for k, v in table.schema.metadata.items()}
+    timestamp = float(meta.pop("timestamp"))
+    series = pd.Series(
+        table.column("value").to_numpy(),
+        index=pd.DatetimeIndex(table.column("date").to_numpy()),
+    )
+    return series, timestamp, meta
+
+
+def _write_df(key: str, series: pd.Series, validators: dict) -> None:
+    if feather is None:
+        set_cached(key, {
+            "dates": [d.isoformat() for d in series.index],
+            "values": series.astype(object).where(series.notna(), None).tolist(),
+            "validators": validators,
+        })
+        return
+
+    table = pa.table({
+        "date": pa.array(series.index.to_numpy(dtype="datetime64[ns]")),
+        "value": pa.array(series.to_numpy()),
+    }).replace_schema_metadata({**validators, "timestamp": str(time.time())})
+    feather.write_feather(table, str(_feather_path(key)))
+
+
+def get_cached_df(key: str) -> Optional[pd.Series]:
+    """Vrátí uloženou časovou řadu (DatetimeIndex → float), nebo None po expiraci."""
+    entry = _read_df(key)
+    if entry is None:
+        return None
+    series, timestamp, _ = entry
+    if time.time() - timestamp > TTL_SECONDS:
+        return None
+    return series
+
+
+def set_cached_df(key: str, series: pd.Series, validators: Optional[dict] = None) -> None:
+    """
+    Uloží časovou řadu s DatetimeIndex (hodnoty zaokrouhlené na 4 místa).
+    validators: HTTP validátory zdroje ("etag", "last_modified") pro podmíněný GET.
+    """
+    _write_df(key, series.astype(float).round(4), validators or {})
+
+
+def get_cached_validators(key: str) -> dict:
+    """HTTP validátory uložené u časové řady (i po expiraci TTL)."""
+    if feather is None:
+        path = _cache_path(key)
+        if not path.exists():
+            return {}
+        return _read_entry(path)["payload"].get("validators", {})
+
+    path = _feather_path(key)
+    if not path.exists():
+        return {}
+    meta = _feather_metadata(path)
+    meta.pop("timestamp", None)
+    return meta
+
+
+def touch_cached_df(key: str) -> Optional[pd.Series]:
+    """Prodlouží TTL uložené řady (zdroj se nezměnil) a vrátí ji; None pokud chybí."""
+    entry = _read_df(key)
+    if entry is None:
+        return None
+    series, _, validators = entry
+    _write_df(key, series, validators)
+    return series
+
+
+def get_cache_info(key: str) -> dict:
+    path = _feather_path(key)
+    if feather is not None and path.exists():
+        timestamp = _feather_timestamp(path)
+    else:
+        path = _cache_path(key)
+        if not path.exists():
+            return {"exists": False, "age_hours": None}
+        timestamp = _read_entry(path)["timestamp"]
+    age_hours = (time.time() - timestamp) / 3600
+    return {"exists": True, "age_hours": round(age_hours, 1), "timestamp": timestamp}
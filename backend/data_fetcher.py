@@ -9,16 +9,28 @@ Strategie: API → cache (24h TTL). Fallback na statické CSV soubory.
 """
 from __future__ import annotations
 
+import asyncio
 import io
 import logging
-import time
 from pathlib import Path
 from typing import Optional
 
 import httpx
+import numpy as np
 import pandas as pd
 
-from cache import get_cached, set_cached
+try:
+    import simdjson
+except ImportError:  # bez pysimdjson se JSON-STAT parsuje celý přes json_loads
+    simdjson = None
+
+from cache import (
+    get_cached_df,
+    get_cached_validators,
+    json_loads,
+    set_cached_df,
+    touch_cached_df,
+)
 
 log = logging.getLogger(__name__)
 
@@ -34,8 +46,8 @@ _EUROSTAT_HEADERS = {
 }
 
 
-def _get_with_retry(
-    client: httpx.Client,
+async def _get_with_retry(
+    client: httpx.AsyncClient,
     url: str,
     max_attempts: int = 3,
     delay: int = 15,
@@ -45,17 +57,48 @@ def _get_with_retry(
     last_exc: Exception = RuntimeError("Žádný pokus nebyl proveden")
     for attempt in range(1, max_attempts + 1):
         try:
-            r = client.get(url, **kwargs)
-            r.raise_for_status()
+            r = await client.get(url, **kwargs)
+            if r.status_code != 304:  # 304 = odpověď na podmíněný GET
+                r.raise_for_status()
             return r
         except Exception as e:
             last_exc = e
             if attempt < max_attempts:
                 log.warning(f"Pokus {attempt}/{max_attempts} selhal ({e}), čekám {delay}s…")
-                time.sleep(delay)
+                await asyncio.sleep(delay)
     raise last_exc
 
 
+async def _get_conditional(
+    client: httpx.AsyncClient,
+    url: str,
+    key: str,
+    **kwargs,
+) -> Optional[httpx.Response]:
+    """
+    Podmíněný GET (If-None-Match / If-Modified-Since) podle validátorů uložených
+    u cache `key`. Vrátí None, pokud zdroj odpověděl 304 Not Modified.
+    """
+    headers = dict(kwargs.pop("headers", None) or {})
+    validators = get_cached_validators(key)
+    if "etag" in validators:
+        headers["If-None-Match"] = validators["etag"]
+    if "last_modified" in validators:
+        headers["If-Modified-Since"] = validators["last_modified"]
+    r = await _get_with_retry(client, url, headers=headers, **kwargs)
+    return None if r.status_code == 304 else r
+
+
+def _response_validators(r: httpx.Response) -> dict:
+    """Vytáhne ETag / Last-Modified z odpovědi pro příští podmíněný GET."""
+    validators = {}
+    if "ETag" in r.headers:
+        validators["etag"] = r.headers["ETag"]
+    if "Last-Modified" in r.headers:
+        validators["last_modified"] = r.headers["Last-Modified"]
+    return validators
+
+
 # --- Inflační cíl ČNB (hardcoded historické hodnoty) ---
 _PISTAR = [
     ("2000-01-01", "2001-12-31", 4.0),
@@ -64,49 +107,63 @@ _PISTAR = [
 ]
 
 
+_PISTAR_STARTS = np.array([start for start, _, _ in _PISTAR], dtype="datetime64[ns]")
+_PISTAR_VALUES = np.array([val for _, _, val in _PISTAR])
+
+
 def build_pistar_series(index: pd.DatetimeIndex) -> pd.Series:
     """Sestaví časovou řadu inflačního cíle ČNB pro daný DatetimeIndex."""
-    values = []
-    for d in index:
-        target = 2.0
-        for start, end, val in _PISTAR:
-            if pd.Timestamp(start) <= d <= pd.Timestamp(end):
-                target = val
-                break
-        values.append(target)
+    # Režimy na sebe navazují, stačí najít poslední začátek <= datum
+    pos = np.searchsorted(_PISTAR_STARTS, index.values, side="right") - 1
+    values = np.where(pos >= 0, _PISTAR_VALUES[pos.clip(0)], 2.0)
     return pd.Series(values, index=index, name="pistar")
 
 
 # --- Repo sazba ČNB ---
 
-def _parse_repo_txt(text: str) -> pd.Series:
+def _parse_repo_txt(content: bytes) -> pd.Series:
     """Parsuje TXT soubor s historií repo sazby z ČNB."""
-    text = text.lstrip("\ufeff")  # strip BOM
-    df = pd.read_csv(io.StringIO(text), sep="|", decimal=",")
-    df.columns = ["date_str", "rate"]
-    df["date"] = pd.to_datetime(df["date_str"].astype(str), format="%Y%m%d")
-    df = df[["date", "rate"]].set_index("date").sort_index()
-    return df["rate"]
+    df = pd.read_csv(
+        io.BytesIO(content),
+        sep="|",
+        decimal=",",
+        header=0,
+        names=["date_str", "rate"],
+        dtype={"date_str": str, "rate": "float64"},
+        encoding="utf-8-sig",  # strip BOM
+        engine="c",
+    )
+    df["date"] = pd.to_datetime(df["date_str"], format="%Y%m%d", cache=True)
+    return df.set_index("date")["rate"].sort_index()
 
 
-def fetch_repo_rate(client: httpx.Client) -> pd.Series:
+async def fetch_repo_rate(client: httpx.AsyncClient) -> pd.Series:
     """
     Stáhne historii 2T repo sazby z ČNB.
     Vrátí měsíční časovou řadu (forward-fill od data změny).
     """
-    cached = get_cached("repo_rate")
-    if cached:
+    s = get_cached_df("repo_rate")
+    if s is not None:
         log.info("Repo sazba: načteno z cache")
-        s = pd.Series(cached["values"], index=pd.to_datetime(cached["dates"]))
         s.index = s.index + pd.offsets.MonthEnd(0)
         return s
 
     url = "https://www.cnb.cz/cs/casto-kladene-dotazy/.galleries/vyvoj_repo_historie.txt"
+    validators: dict = {}
     try:
         log.info("Stahování repo sazby z ČNB...")
-        r = client.get(url, timeout=30, follow_redirects=True)
-        r.raise_for_status()
-        changes = _parse_repo_txt(r.content.decode("utf-8"))
+        r = await _get_conditional(
+            client, url, "repo_rate", max_attempts=1, timeout=30, follow_redirects=True,
+        )
+        if r is None:
+            s = touch_cached_df("repo_rate")
+            if s is not None:
+                log.info("Repo sazba: beze změny (304), prodlužuji platnost cache")
+                return s
+            # Cache mezitím zmizela – stáhneme data bez podmínky
+            r = await _get_with_retry(client, url, max_attempts=1, timeout=30, follow_redirects=True)
+        changes = _parse_repo_txt(r.content)
+        validators = _response_validators(r)
     except Exception as e:
         log.warning(f"Stahování repo sazby selhalo: {e}, zkouším fallback CSV")
         changes = _load_fallback_csv("repo_rate", index_col="date", value_col="rate")
@@ -114,46 +171,47 @@ def fetch_repo_rate(client: httpx.Client) -> pd.Series:
             raise RuntimeError("Repo sazba není dostupná (API ani fallback CSV)") from e
 
     # Převod na měsíční frekvenci (forward-fill od data poslední změny)
+    changes = changes.dropna().sort_index()
     monthly_idx = pd.date_range("2000-01-01", "2026-12-31", freq="ME")
-    # Pro každý měsíc najdeme poslední platnou sazbu (ffill)
-    # Reindex raw changes series to daily, then resample to month-end
-    daily_idx = pd.date_range(changes.index.min(), "2026-12-31", freq="D")
-    daily = changes.reindex(daily_idx).ffill()
-    monthly = daily.resample("ME").last()
-    monthly = monthly[monthly.index >= "2000-01-01"]
-
-    set_cached("repo_rate", {
-        "dates": [d.isoformat() for d in monthly.index],
-        "values": [round(float(v), 4) if pd.notna(v) else None for v in monthly],
-    })
+    # Pro každý konec měsíce najdeme poslední změnu sazby <= tomuto datu;
+    # měsíce před první známou změnou vynecháme
+    pos = np.searchsorted(changes.index.values, monthly_idx.values, side="right") - 1
+    valid = pos >= 0
+    monthly = pd.Series(changes.values[pos[valid]], index=monthly_idx[valid], name=changes.name)
+
+    set_cached_df("repo_rate", monthly, validators)
     return monthly
 
 
 # --- CPI (HICP Eurostat) ---
 
-def _parse_eurostat_jsonstat(data: dict) -> pd.Series:
-    """Parsuje Eurostat JSON-STAT1 formát."""
-    time_dim = data["dimension"]["time"]
-    time_index = time_dim["category"]["index"]  # {period: int_pos}
-    vals_raw = data["value"]  # dict {str_pos: value}
+def _parse_eurostat_jsonstat(content: bytes) -> pd.Series:
+    """
+    Parsuje Eurostat JSON-STAT1 formát.
+    S pysimdjson se materializují jen potřebné podstromy (časový index a hodnoty).
+    """
+    if simdjson is not None:
+        doc = simdjson.Parser().parse(content)
+        time_index = doc.at_pointer("/dimension/time/category/index").as_dict()  # {period: int_pos}
+        vals_raw = doc.at_pointer("/value")  # lazy objekt {str_pos: value}
+    else:
+        data = json_loads(content)
+        time_index = data["dimension"]["time"]["category"]["index"]
+        vals_raw = data["value"]
 
-    series_vals = {}
-    for period, pos in time_index.items():
-        v = vals_raw.get(str(pos))
-        if v is not None:
-            series_vals[period] = float(v)
-    return pd.Series(series_vals)
+    # Chybějící pozice (None) se v float poli stanou NaN a vypadnou přes dropna
+    values = np.array([vals_raw.get(str(pos)) for pos in time_index.values()], dtype=float)
+    return pd.Series(values, index=list(time_index.keys())).dropna()
 
 
-def fetch_cpi(client: httpx.Client) -> pd.Series:
+async def fetch_cpi(client: httpx.AsyncClient) -> pd.Series:
     """
     Stáhne HICP CPI pro ČR z Eurostat (prc_hicp_midx).
     Vrátí meziroční % změnu na měsíční frekvenci.
     """
-    cached = get_cached("cpi")
-    if cached:
+    s = get_cached_df("cpi")
+    if s is not None:
         log.info("CPI: načteno z cache")
-        s = pd.Series(cached["values"], index=pd.to_datetime(cached["dates"]))
         s.index = s.index + pd.offsets.MonthEnd(0)
         return s
 
@@ -161,10 +219,19 @@ def fetch_cpi(client: httpx.Client) -> pd.Series:
         "https://ec.europa.eu/eurostat/api/dissemination/statistics/1.0/data/"
         "prc_hicp_midx?geo=CZ&unit=I15&coicop=CP00&freq=M"
     )
+    validators: dict = {}
     try:
         log.info("Stahování CPI z Eurostat...")
-        r = _get_with_retry(client, url, timeout=45, headers=_EUROSTAT_HEADERS)
-        s_idx = _parse_eurostat_jsonstat(r.json())
+        r = await _get_conditional(client, url, "cpi", timeout=45, headers=_EUROSTAT_HEADERS)
+        if r is None:
+            s = touch_cached_df("cpi")
+            if s is not None:
+                log.info("CPI: beze změny (304), prodlužuji platnost cache")
+                return s
+            # Cache mezitím zmizela – stáhneme data bez podmínky
+            r = await _get_with_retry(client, url, timeout=45, headers=_EUROSTAT_HEADERS)
+        s_idx = _parse_eurostat_jsonstat(r.content)
+        validators = _response_validators(r)
     except Exception as e:
         log.warning(f"Stahování CPI selhalo: {e}, zkouším fallback CSV")
         s_idx = _load_fallback_csv("cpi_index", index_col="date", value_col="index")
@@ -172,38 +239,27 @@ def fetch_cpi(client: httpx.Client) -> pd.Series:
             raise RuntimeError("CPI není dostupné (API ani fallback CSV)") from e
 
     # Převod na měsíc-konec datetime
-    s_idx.index = pd.to_datetime(s_idx.index + "-01") + pd.offsets.MonthEnd(0)
+    s_idx.index = pd.to_datetime(s_idx.index, format="%Y-%m") + pd.offsets.MonthEnd(0)
     s_idx = s_idx.sort_index()
 
     # Meziroční % změna
-    yoy = (s_idx / s_idx.shift(12) - 1) * 100
+    yoy = s_idx.pct_change(12, fill_method=None).mul(100)
     yoy = yoy[yoy.index >= "2000-01-01"].dropna()
 
-    set_cached("cpi", {
-        "dates": [d.isoformat() for d in yoy.index],
-        "values": [round(float(v), 4) if pd.notna(v) else None for v in yoy],
-    })
+    set_cached_df("cpi", yoy, validators)
     return yoy
 
 
 # --- HDP Eurostat ---
 
-def _quarter_to_month_end(q: str) -> pd.Timestamp:
-    """'2000-Q1' -> 2000-03-31 (konec posledního měsíce čtvrtletí)"""
-    year, qt = q.split("-Q")
-    month = int(qt) * 3
-    return pd.Timestamp(int(year), month, 1) + pd.offsets.MonthEnd(0)
-
-
-def fetch_gdp(client: httpx.Client) -> pd.Series:
+async def fetch_gdp(client: httpx.AsyncClient) -> pd.Series:
     """
     Stáhne čtvrtletní reálný HDP z Eurostat (namq_10_gdp, CLV10_MNAC, SCA).
     Vypočítá meziroční % změnu a forward-fill na měsíční frekvenci.
     """
-    cached = get_cached("gdp")
-    if cached:
+    s = get_cached_df("gdp")
+    if s is not None:
         log.info("HDP: načteno z cache")
-        s = pd.Series(cached["values"], index=pd.to_datetime(cached["dates"]))
         s.index = s.index + pd.offsets.MonthEnd(0)
         return s
 
@@ -211,45 +267,53 @@ def fetch_gdp(client: httpx.Client) -> pd.Series:
         "https://ec.europa.eu/eurostat/api/dissemination/statistics/1.0/data/"
         "namq_10_gdp?geo=CZ&unit=CLV10_MNAC&s_adj=SCA&na_item=B1GQ&freq=Q"
     )
+    validators: dict = {}
     try:
         log.info("Stahování HDP z Eurostat...")
-        r = _get_with_retry(client, url, timeout=45, headers=_EUROSTAT_HEADERS)
-        s_idx = _parse_eurostat_jsonstat(r.json())
+        r = await _get_conditional(client, url, "gdp", timeout=45, headers=_EUROSTAT_HEADERS)
+        if r is None:
+            s = touch_cached_df("gdp")
+            if s is not None:
+                log.info("HDP: beze změny (304), prodlužuji platnost cache")
+                return s
+            # Cache mezitím zmizela – stáhneme data bez podmínky
+            r = await _get_with_retry(client, url, timeout=45, headers=_EUROSTAT_HEADERS)
+        s_idx = _parse_eurostat_jsonstat(r.content)
+        validators = _response_validators(r)
     except Exception as e:
         log.warning(f"Stahování HDP selhalo: {e}, zkouším fallback CSV")
         s_idx = _load_fallback_csv("gdp_index", index_col="date", value_col="index")
         if s_idx is None:
             raise RuntimeError("HDP není dostupné (API ani fallback CSV)") from e
 
-    # Čtvrtletní index → měsíc-konec
-    s_idx.index = s_idx.index.map(_quarter_to_month_end)
+    # Čtvrtletní index → měsíc-konec ('2000-Q1' -> 2000-03-31)
+    s_idx.index = pd.PeriodIndex(s_idx.index, freq="Q").to_timestamp(how="end").normalize()
     s_idx = s_idx.sort_index()
 
     # Meziroční % změna (srovnání se stejným čtvrtletím minulého roku)
-    yoy_q = (s_idx / s_idx.shift(4) - 1) * 100
+    yoy_q = s_idx.pct_change(4, fill_method=None).mul(100)
     yoy_q = yoy_q[yoy_q.index >= "2000-01-01"].dropna()
 
     # Forward-fill na měsíční frekvenci (Q1 hodnota platí pro leden, únor, březen)
     monthly_idx = pd.date_range("2000-01-01", "2026-12-31", freq="ME")
     yoy_m = yoy_q.reindex(monthly_idx, method="ffill")
 
-    set_cached("gdp", {
-        "dates": [d.isoformat() for d in yoy_m.index],
-        "values": [round(float(v), 4) if pd.notna(v) else None for v in yoy_m],
-    })
+    set_cached_df("gdp", yoy_m, validators)
     return yoy_m
 
 
 # --- Sestavení hlavního DataFramu ---
 
-def fetch_all_data(client: httpx.Client) -> dict:
+async def fetch_all_data(client: httpx.AsyncClient) -> dict:
     """
-    Stáhne všechna data a sestaví sjednocený DataFrame.
+    Stáhne všechna data (souběžně) a sestaví sjednocený DataFrame.
     Klíč 'dataframe' obsahuje pandas DataFrame s měsíčním indexem.
     """
-    repo = fetch_repo_rate(client)
-    cpi = fetch_cpi(client)
-    gdp = fetch_gdp(client)
+    repo, cpi, gdp = await asyncio.gather(
+        fetch_repo_rate(client),
+        fetch_cpi(client),
+        fetch_gdp(client),
+    )
 
     # Sjednotit na společný měsíční index (průnik dostupných dat, od 2000-01)
     common_idx = repo.index[repo.index >= "2000-01-01"]
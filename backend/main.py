@@ -10,23 +10,26 @@ Endpointy:
 """
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
 import sys
 from contextlib import asynccontextmanager
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
 
 import httpx
 import pandas as pd
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 
-from cache import get_cache_info
+from cache import get_cache_info, json_dumps
 from data_fetcher import fetch_all_data
-from taylor import TaylorParams, calculate_taylor, calibrate_ols, compute_stats
+from taylor import TaylorParams, TaylorStats, calculate_taylor, calibrate_ols, compute_stats
 
 logging.basicConfig(
     level=logging.INFO,
@@ -44,12 +47,31 @@ async def lifespan(app: FastAPI):
     """Stáhne data při startu aplikace."""
     log.info("Spouštím aplikaci – stahuji data...")
     try:
-        with httpx.Client() as client:
-            _store.update(fetch_all_data(client))
+        async with httpx.AsyncClient(http2=True) as client:
+            data = await fetch_all_data(client)
+        # Odvozené hodnoty spočítáme předem a do _store zapíšeme vše najednou,
+        # aby endpointy nikdy neviděly DataFrame bez nich
+        df = data["dataframe"]
+        dates_ym = df.index.strftime("%Y-%m").tolist()
+        data.update(
+            dates_ym=dates_ym,
+            data_json=_build_data_json(df, dates_ym),
+            version=_data_version(df),
+        )
+        _store.update(data)
+        _calibrate_cached.cache_clear()
+        _period_slice.cache_clear()
         log.info("Data připravena.")
     except Exception as e:
         log.error(f"Chyba při stahování dat: {e}")
         log.warning("Aplikace poběží bez dat – zkontrolujte připojení k internetu.")
+
+    if "dataframe" in _store:
+        # Předkompilace numba kernelu, aby ji nezaplatil první request
+        try:
+            calculate_taylor(_store["dataframe"].iloc[:1], rho=0.8, rstar=1.5, alpha=1.5, beta=0.5)
+        except Exception as e:
+            log.warning(f"Předkompilace výpočtu Taylorova pravidla selhala: {e}")
     yield
     log.info("Aplikace se ukončuje.")
 
@@ -66,6 +88,7 @@ app.add_middleware(
     allow_methods=["GET"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 
 # ─── Pomocné funkce ─────────────────────────────────────────────────────────
@@ -77,21 +100,54 @@ def _get_df() -> pd.DataFrame:
     return df
 
 
-def _safe_float(v) -> Optional[float]:
-    try:
-        f = float(v)
-        return None if pd.isna(f) else round(f, 4)
-    except (TypeError, ValueError):
-        return None
+def _data_version(df: pd.DataFrame) -> str:
+    """Otisk obsahu DataFrame (index i hodnoty) – klíč pro cache odvozených výsledků."""
+    row_hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    return hashlib.blake2b(row_hashes.tobytes(), digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=4)
+def _calibrate_cached(version: str) -> TaylorParams:
+    """OLS kalibrace pro danou verzi dat; přepočítá se jen při změně dat."""
+    return calibrate_ols(_store["dataframe"])
 
 
-def _filter_df(df: pd.DataFrame, date_from: str, date_to: str) -> pd.DataFrame:
+def _col_to_list(s: pd.Series) -> list:
+    """Převede sloupec na list floatů zaokrouhlených na 4 místa; NaN → None."""
+    return s.round(4).astype(object).where(s.notna(), None).tolist()
+
+
+def _build_data_json(df: pd.DataFrame, dates: list[str]) -> bytes:
+    """Serializuje všechny časové řady pro /api/data (jednou při načtení dat)."""
+    return json_dumps({
+        "dates": dates,
+        "actual_rate": _col_to_list(df["actual_rate"]),
+        "cpi": _col_to_list(df["cpi"]),
+        "gdp": _col_to_list(df["gdp"]),
+        "pistar": _col_to_list(df["pistar"]),
+    })
+
+
+def _taylor_and_stats(
+    df: pd.DataFrame, rho: float, rstar: float, alpha: float, beta: float,
+) -> tuple[pd.Series, TaylorStats]:
+    """Implikovaná sazba + statistiky shody (spouští se mimo event loop)."""
+    implied = calculate_taylor(df, rho=rho, rstar=rstar, alpha=alpha, beta=beta)
+    return implied, compute_stats(df["actual_rate"], implied)
+
+
+@lru_cache(maxsize=256)
+def _period_slice(version: str, date_from: str, date_to: str) -> slice:
+    """Poziční řez indexu pro období date_from–date_to (index je seřazený)."""
     try:
         start = pd.to_datetime(date_from)
         end = pd.to_datetime(date_to) + pd.offsets.MonthEnd(0)
     except Exception:
-        return df
-    return df[(df.index >= start) & (df.index <= end)]
+        return slice(None)
+    if pd.isna(start) or pd.isna(end):
+        return slice(0, 0)
+    index = _store["dataframe"].index
+    return slice(index.searchsorted(start, side="left"), index.searchsorted(end, side="right"))
 
 
 # ─── API endpointy ──────────────────────────────────────────────────────────
@@ -99,18 +155,12 @@ def _filter_df(df: pd.DataFrame, date_from: str, date_to: str) -> pd.DataFrame:
 @app.get("/api/data")
 def get_data():
     """Vrátí všechny časové řady jako JSON."""
-    df = _get_df()
-    return JSONResponse({
-        "dates": [d.strftime("%Y-%m") for d in df.index],
-        "actual_rate": [_safe_float(v) for v in df["actual_rate"]],
-        "cpi": [_safe_float(v) for v in df["cpi"]],
-        "gdp": [_safe_float(v) for v in df["gdp"]],
-        "pistar": [_safe_float(v) for v in df["pistar"]],
-    })
+    _get_df()
+    return Response(content=_store["data_json"], media_type="application/json")
 
 
 @app.get("/api/taylor")
-def get_taylor(
+async def get_taylor(
     rho: float = Query(0.80, ge=0.0, le=0.99, description="Parametr setrvačnosti"),
     rstar: float = Query(1.5, ge=-2.0, le=5.0, description="Neutrální reálná sazba (%)"),
     alpha: float = Query(1.5, ge=0.0, le=3.0, description="Váha inflační mezery"),
@@ -120,26 +170,28 @@ def get_taylor(
 ):
     """Vrátí implikovanou repo sazbu dle Taylorova pravidla + statistiky."""
     df = _get_df()
-    df_filtered = _filter_df(df, date_from, date_to)
+    period = _period_slice(_store["version"], date_from, date_to)
+    df_filtered = df.iloc[period]
 
     if df_filtered.empty:
         raise HTTPException(400, "Zvolené období neobsahuje žádná data.")
 
-    implied = calculate_taylor(df_filtered, rho=rho, rstar=rstar, alpha=alpha, beta=beta)
-    stats = compute_stats(df_filtered["actual_rate"], implied)
+    implied, stats = await asyncio.to_thread(
+        _taylor_and_stats, df_filtered, rho, rstar, alpha, beta,
+    )
 
     return JSONResponse({
-        "dates": [d.strftime("%Y-%m") for d in implied.index],
-        "implied_rate": [_safe_float(v) for v in implied],
+        "dates": _store["dates_ym"][period],
+        "implied_rate": _col_to_list(implied),
         "stats": stats,
     })
 
 
 @app.get("/api/default-params")
-def get_default_params():
+async def get_default_params():
     """Vrátí OLS-odhadnuté výchozí parametry Taylorova pravidla."""
-    df = _get_df()
-    params = calibrate_ols(df)
+    _get_df()
+    params = await asyncio.to_thread(_calibrate_cached, _store["version"])
     return JSONResponse(dict(params))
 
 
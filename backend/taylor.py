@@ -25,6 +25,11 @@ from typing import TypedDict
 import numpy as np
 import pandas as pd
 
+try:
+    from numba import njit
+except ImportError:  # bez numba se použije vektorizovaná NumPy varianta
+    njit = None
+
 log = logging.getLogger(__name__)
 
 
@@ -42,6 +47,71 @@ class TaylorStats(TypedDict):
     mean_deviation: float
 
 
+def _taylor_vectorized(
+    actual: np.ndarray,
+    pi: np.ndarray,
+    g: np.ndarray,
+    pistar: np.ndarray,
+    rho: float,
+    rstar: float,
+    alpha: float,
+    beta: float,
+) -> np.ndarray:
+    """Implikovaná sazba po celých polích (NumPy)."""
+    taylor_target = rstar + pi + alpha * (pi - pistar) + beta * g
+
+    # Lagged SKUTEČNÁ (ne implikovaná) repo sazba; první period používá vlastní hodnotu
+    i_prev = np.empty_like(actual)
+    i_prev[:1] = actual[:1]
+    i_prev[1:] = actual[:-1]
+
+    # Chybějící i_{t-1}: v první periodě se nahradí Taylor targetem, jinak se vynechá
+    missing_prev = np.isnan(i_prev)
+    fill = np.zeros_like(taylor_target)
+    fill[:1] = taylor_target[:1]
+    i_prev = np.where(missing_prev, fill, i_prev)
+
+    result = rho * i_prev + (1 - rho) * taylor_target
+    result[np.isnan(pi) | np.isnan(g)] = np.nan
+    return result
+
+
+def _taylor_loop(
+    actual: np.ndarray,
+    pi: np.ndarray,
+    g: np.ndarray,
+    pistar: np.ndarray,
+    rho: float,
+    rstar: float,
+    alpha: float,
+    beta: float,
+) -> np.ndarray:
+    """Implikovaná sazba po řádcích (určeno pro kompilaci přes numba)."""
+    n = actual.shape[0]
+    result = np.empty(n)
+    for i in range(n):
+        if np.isnan(pi[i]) or np.isnan(g[i]):
+            result[i] = np.nan
+            continue
+
+        taylor_target = rstar + pi[i] + alpha * (pi[i] - pistar[i]) + beta * g[i]
+
+        if i == 0:
+            # První period: Taylor target bez setrvačnosti
+            i_prev = actual[0] if not np.isnan(actual[0]) else taylor_target
+            result[i] = rho * i_prev + (1 - rho) * taylor_target
+        elif np.isnan(actual[i - 1]):
+            result[i] = (1 - rho) * taylor_target
+        else:
+            # Lagged SKUTEČNÁ (ne implikovaná) repo sazba
+            result[i] = rho * actual[i - 1] + (1 - rho) * taylor_target
+    return result
+
+
+# S numba běží čitelná rekurze zkompilovaná; jinak vektorizovaný ekvivalent
+_taylor_kernel = njit(cache=True)(_taylor_loop) if njit is not None else _taylor_vectorized
+
+
 def calculate_taylor(
     df: pd.DataFrame,
     rho: float,
@@ -67,33 +137,15 @@ def calculate_taylor(
         Tím se předchází kumulaci chyb a výsledek je ekonomicky interpretovatelný
         jako "kam by ČNB sáhla, kdyby sledovala Taylor rule – ale s daným laggem".
     """
-    result = pd.Series(index=df.index, dtype=float, name="implied_rate")
-    actual = df["actual_rate"]
-
-    for i, date in enumerate(df.index):
-        row = df.loc[date]
-        pi_t = row["cpi"]
-        g_t = row["gdp"]
-        pistar_t = row["pistar"]
-
-        if pd.isna(pi_t) or pd.isna(g_t):
-            result.iloc[i] = np.nan
-            continue
-
-        taylor_target = rstar + pi_t + alpha * (pi_t - pistar_t) + beta * g_t
-
-        if i == 0:
-            # První period: Taylor target bez setrvačnosti
-            result.iloc[i] = (1 - rho) * taylor_target + rho * (actual.iloc[0] if pd.notna(actual.iloc[0]) else taylor_target)
-        else:
-            # Lagged SKUTEČNÁ (ne implikovaná) repo sazba
-            i_prev = actual.iloc[i - 1]
-            if pd.isna(i_prev):
-                result.iloc[i] = (1 - rho) * taylor_target
-            else:
-                result.iloc[i] = rho * i_prev + (1 - rho) * taylor_target
-
-    return result.round(4)
+    arr = df[["actual_rate", "cpi", "gdp", "pistar"]].to_numpy(dtype=float)
+    result = _taylor_kernel(
+        np.ascontiguousarray(arr[:, 0]),
+        np.ascontiguousarray(arr[:, 1]),
+        np.ascontiguousarray(arr[:, 2]),
+        np.ascontiguousarray(arr[:, 3]),
+        float(rho), float(rstar), float(alpha), float(beta),
+    )
+    return pd.Series(result, index=df.index, name="implied_rate").round(4)
 
 
 def calibrate_ols(df: pd.DataFrame) -> TaylorParams:
@@ -111,25 +163,33 @@ def calibrate_ols(df: pd.DataFrame) -> TaylorParams:
 
     Ořez výsledků na fyzikálně smysluplné rozsahy.
     """
-    data = df[["actual_rate", "cpi", "gdp", "pistar"]].copy()
-    data["lagged_rate"] = data["actual_rate"].shift(1)
-    data = data.dropna()
-
-    if len(data) < 20:
+    arr = df[["actual_rate", "cpi", "gdp", "pistar"]].to_numpy(dtype=float)
+    cur = arr[1:]
+    lagged_rate = arr[:-1, 0]
+    mask = np.isfinite(cur).all(axis=1) & np.isfinite(lagged_rate)
+    cur = cur[mask]
+    lagged_rate = lagged_rate[mask]
+
+    if len(cur) < 20:
         log.warning("OLS: nedostatek dat, vracím výchozí parametry")
         return TaylorParams(rho=0.80, rstar=1.5, alpha=1.5, beta=0.5)
 
     # Design matrix: [1, i_{t-1}, π_t, g_t]
-    X_arr = np.column_stack([
-        np.ones(len(data)),
-        data["lagged_rate"].values,
-        data["cpi"].values,
-        data["gdp"].values,
-    ])
-    y_arr = data["actual_rate"].values
+    X_arr = np.empty((len(cur), 4))
+    X_arr[:, 0] = 1.0
+    X_arr[:, 1] = lagged_rate
+    X_arr[:, 2] = cur[:, 1]
+    X_arr[:, 3] = cur[:, 2]
+    y_arr = cur[:, 0]
 
     try:
-        coeffs, _, _, _ = np.linalg.lstsq(X_arr, y_arr, rcond=None)
+        # Normální rovnice (4×4 systém); při špatné podmíněnosti SVD přes lstsq
+        XtX = X_arr.T @ X_arr
+        Xty = X_arr.T @ y_arr
+        if np.linalg.cond(XtX) < 1e10:
+            coeffs = np.linalg.solve(XtX, Xty)
+        else:
+            coeffs, _, _, _ = np.linalg.lstsq(X_arr, y_arr, rcond=None)
     except Exception as e:
         log.error(f"OLS selhala: {e}")
         return TaylorParams(rho=0.80, rstar=1.5, alpha=1.5, beta=0.5)
@@ -155,7 +215,7 @@ def calibrate_ols(df: pd.DataFrame) -> TaylorParams:
 
     alpha = a_hat / one_minus_rho - 1.0
     beta = b_hat / one_minus_rho
-    pistar_avg = float(data["pistar"].mean())
+    pistar_avg = float(cur[:, 3].mean())
     rstar = c_hat / one_minus_rho + alpha * pistar_avg
 
     # Ořez na smysluplné rozsahy
@@ -13,7 +13,7 @@ Výstup:
 """
 from __future__ import annotations
 
-import json
+import asyncio
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
@@ -28,8 +28,12 @@ sys.path.insert(0, str(BACKEND))
 # Monkey-patch cache modulu PŘED importem data_fetcher.
 # V CI nechceme používat soubory z .cache/ – chceme vždy čerstvá data.
 import cache  # noqa: E402
-cache.get_cached = lambda key: None
-cache.set_cached  = lambda key, val: None
+from cache import json_dumps  # noqa: E402
+cache.get_cached            = lambda key: None
+cache.set_cached            = lambda key, val: None
+cache.get_cached_df         = lambda key: None
+cache.set_cached_df         = lambda key, val, validators=None: None
+cache.get_cached_validators = lambda key: {}
 
 import httpx                          # noqa: E402
 from data_fetcher import fetch_all_data  # noqa: E402
@@ -38,24 +42,18 @@ from taylor import calibrate_ols     # noqa: E402
 
 def _series_to_list(series) -> list:
     """Převede pandas Series na Python list; NaN → None."""
-    result = []
-    for v in series:
-        try:
-            import math
-            if math.isnan(float(v)):
-                result.append(None)
-            else:
-                result.append(round(float(v), 4))
-        except (TypeError, ValueError):
-            result.append(None)
-    return result
+    return series.round(4).astype(object).where(series.notna(), None).tolist()
+
+
+async def _fetch() -> dict:
+    async with httpx.AsyncClient(timeout=90.0, http2=True) as client:
+        return await fetch_all_data(client)
 
 
 def main() -> None:
     print("Stahuji data z ČNB a Eurostatu…")
 
-    with httpx.Client(timeout=90.0) as client:
-        store = fetch_all_data(client)
+    store = asyncio.run(_fetch())
 
     df = store.get("dataframe")
     if df is None or df.empty:
@@ -77,10 +75,7 @@ def main() -> None:
     }
 
     data_path = FRONTEND / "data.json"
-    data_path.write_text(
-        json.dumps(data_payload, ensure_ascii=False, separators=(",", ":")),
-        encoding="utf-8",
-    )
+    data_path.write_bytes(json_dumps(data_payload))
     size_kb = data_path.stat().st_size // 1024
     print(f"  Zapsáno: {data_path}  ({size_kb} kB)")
 
@@ -90,10 +85,7 @@ def main() -> None:
     params_payload = dict(params)
 
     params_path = FRONTEND / "params.json"
-    params_path.write_text(
-        json.dumps(params_payload, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    params_path.write_bytes(json_dumps(params_payload, indent=True))
     print(f"  Zapsáno: {params_path}")
     print(f"  Parametry: {params_payload}")
 